@@ -2,14 +2,28 @@
 CalcBurst Python Client Example
 
 This script demonstrates how to interact with the CalcBurst API
-using Python's requests library.
+using the httpx library over HTTP/2.
 """
 
-import requests
+import asyncio
+import httpx
 import json
+import sys
 import time
 from typing import List, Dict, Any
 
+# uvloop is an optional, faster event loop; it does not support Windows
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Maximum number of in-flight requests for batch calculations
+CONCURRENCY = 100
+
+# Maximum number of operations the batch endpoint accepts per request
+MAX_BATCH_SIZE = 100
+
 class CalcBurstClient:
     """Client for interacting with CalcBurst API"""
     
@@ -21,10 +35,21 @@ class CalcBurstClient:
             api_url: Base URL of the CalcBurst API
         """
         self.api_url = api_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json'
-        })
+        
+        # HTTP/2 multiplexes requests over one kept-alive connection,
+        # so repeated calls skip the TCP + TLS handshake
+        self.session = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(
+                    max_keepalive_connections=32,
+                    max_connections=128,
+                    keepalive_expiry=85.0
+                )
+            ),
+            headers={'Content-Type': 'application/json'}
+        )
     
     def calculate(self, operation: str, operands: List[float], 
                  calc_id: str = None) -> Dict[str, Any]:
@@ -40,7 +65,7 @@ class CalcBurstClient:
             Dictionary containing calculation result and metadata
         
         Raises:
-            requests.exceptions.RequestException: If the request fails
+            httpx.HTTPError: If the request fails
         """
         payload = {
             'operation': operation,
@@ -54,9 +79,9 @@ class CalcBurstClient:
             response = self.session.post(self.api_url, json=payload)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error: {e}")
-            if hasattr(e.response, 'text'):
+            if isinstance(e, httpx.HTTPStatusError):
                 print(f"Response: {e.response.text}")
             raise
     
@@ -100,14 +125,123 @@ class CalcBurstClient:
         Returns:
             List of results
         """
+        return AsyncCalcBurstClient(self.api_url).batch_calculate_sync(operations)
+
+
+class AsyncCalcBurstClient:
+    """Asynchronous client for issuing concurrent CalcBurst requests"""
+    
+    def __init__(self, api_url: str, batch_url: str = None):
+        """
+        Initialize the async CalcBurst client
+        
+        Args:
+            api_url: Base URL of the CalcBurst API
+            batch_url: URL of the batch endpoint, defaults to the sibling
+                       /batch resource of api_url
+        """
+        self.api_url = api_url
+        self.batch_url = batch_url or api_url.rstrip('/').rsplit('/', 1)[0] + '/batch'
+        self._session = None
+    
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """Shared HTTP/2 client, created lazily on first use"""
+        if self._session is None or self._session.is_closed:
+            self._session = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=CONCURRENCY, keepalive_expiry=85.0),
+                headers={'Content-Type': 'application/json'}
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the underlying HTTP client"""
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+    
+    async def _post_batch(self, chunk: List[Dict[str, Any]], sem: asyncio.Semaphore,
+                          timeout: float) -> List[Dict[str, Any]]:
+        """POST one chunk of operations to the batch endpoint"""
+        payload = []
+        for op in chunk:
+            item = {
+                'operation': op['operation'],
+                'operands': op['operands']
+            }
+            if op.get('id'):
+                item['id'] = op['id']
+            payload.append(item)
+        
+        async with sem:
+            response = await self.session.post(
+                self.batch_url, json=payload, timeout=httpx.Timeout(timeout)
+            )
+            response.raise_for_status()
+            return response.json()['results']
+    
+    async def batch_calculate(self, operations: List[Dict[str, Any]],
+                              max_concurrency: int = 64, batch_size: int = 25,
+                              timeout: float = 30.0) -> List[Dict[str, Any]]:
+        """
+        Perform multiple calculations concurrently
+        
+        Operations are sent to the batch endpoint in chunks of batch_size,
+        with at most max_concurrency chunks in flight at once.
+        
+        Args:
+            operations: List of operation dictionaries
+            max_concurrency: Maximum number of concurrent batch requests
+            batch_size: Number of operations per batch request, at most MAX_BATCH_SIZE
+            timeout: Seconds to wait for each batch request
+        
+        Returns:
+            List of results, in the same order as operations
+        
+        Raises:
+            ValueError: If batch_size is outside 1..MAX_BATCH_SIZE
+        """
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        
+        sem = asyncio.Semaphore(max_concurrency)
+        chunks = [operations[i:i + batch_size] for i in range(0, len(operations), batch_size)]
+        responses = await asyncio.gather(
+            *(self._post_batch(chunk, sem, timeout) for chunk in chunks),
+            return_exceptions=True
+        )
+        
         results = []
-        for op in operations:
-            try:
-                result = self.calculate(op['operation'], op['operands'])
-                results.append(result)
-            except Exception as e:
-                results.append({'error': str(e)})
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                results.extend({'error': str(response) or type(response).__name__} for _ in chunk)
+            else:
+                results.extend(response)
         return results
+    
+    def batch_calculate_sync(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Blocking wrapper around batch_calculate for synchronous callers
+        
+        Args:
+            operations: List of operation dictionaries
+        
+        Returns:
+            List of results
+        """
+        async def run():
+            try:
+                return await self.batch_calculate(operations)
+            finally:
+                await self.close()
+        
+        # Use uvloop for this run only, leaving the process-wide policy alone
+        if uvloop is not None and sys.platform != 'win32' and hasattr(asyncio, 'Runner'):
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+                return runner.run(run())
+        
+        return asyncio.run(run())
 
 
 def main():
@@ -180,7 +314,7 @@ def main():
     print("\n9. Error handling - Division by zero")
     try:
         result = client.divide(10, 0)
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         print(f"   Caught expected error: {e}")
     
     # Example 10: Performance measurement
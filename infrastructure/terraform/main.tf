@@ -90,6 +90,7 @@ resource "aws_iam_role_policy" "lambda_policy" {
         Effect = "Allow"
         Action = [
           "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:GetItem",
           "dynamodb:Query",
           "dynamodb:Scan",
@@ -200,6 +201,31 @@ resource "aws_api_gateway_integration" "lambda_integration" {
   uri                     = aws_lambda_function.calculator.invoke_arn
 }
 
+# API Gateway Batch Resource
+resource "aws_api_gateway_resource" "batch" {
+  rest_api_id = aws_api_gateway_rest_api.calcburst_api.id
+  parent_id   = aws_api_gateway_rest_api.calcburst_api.root_resource_id
+  path_part   = "batch"
+}
+
+# API Gateway Batch Method
+resource "aws_api_gateway_method" "batch_post" {
+  rest_api_id   = aws_api_gateway_rest_api.calcburst_api.id
+  resource_id   = aws_api_gateway_resource.batch.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+# API Gateway Batch Integration
+resource "aws_api_gateway_integration" "batch_integration" {
+  rest_api_id             = aws_api_gateway_rest_api.calcburst_api.id
+  resource_id             = aws_api_gateway_resource.batch.id
+  http_method             = aws_api_gateway_method.batch_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.calculator.invoke_arn
+}
+
 # Lambda Permission for API Gateway
 resource "aws_lambda_permission" "api_gateway" {
   statement_id  = "AllowAPIGatewayInvoke"
@@ -212,11 +238,28 @@ resource "aws_lambda_permission" "api_gateway" {
 # API Gateway Deployment
 resource "aws_api_gateway_deployment" "calcburst_deployment" {
   depends_on = [
-    aws_api_gateway_integration.lambda_integration
+    aws_api_gateway_integration.lambda_integration,
+    aws_api_gateway_integration.batch_integration
   ]
   
   rest_api_id = aws_api_gateway_rest_api.calcburst_api.id
   stage_name  = var.environment
+  
+  # Redeploy the stage whenever a route changes
+  triggers = {
+    redeployment = sha1(jsonencode([
+      aws_api_gateway_resource.calculate.id,
+      aws_api_gateway_method.calculate_post.id,
+      aws_api_gateway_integration.lambda_integration.id,
+      aws_api_gateway_resource.batch.id,
+      aws_api_gateway_method.batch_post.id,
+      aws_api_gateway_integration.batch_integration.id,
+    ]))
+  }
+  
+  lifecycle {
+    create_before_destroy = true
+  }
 }
 
 # API Gateway Stage
@@ -3,6 +3,11 @@ output "api_gateway_url" {
   value       = "${aws_api_gateway_stage.calcburst_stage.invoke_url}/calculate"
 }
 
+output "api_gateway_batch_url" {
+  description = "API Gateway batch endpoint URL"
+  value       = "${aws_api_gateway_stage.calcburst_stage.invoke_url}/batch"
+}
+
 output "lambda_function_name" {
   description = "Lambda function name"
   value       = aws_lambda_function.calculator.function_name
@@ -1,104 +1,304 @@
 import json
-import boto3
+import orjson
 import time
 import os
-from decimal import Decimal
-from datetime import datetime
-from prometheus_client import Counter, Histogram, Gauge
+import random
+import math
+import operator
+import functools
+from itertools import islice
+from decimal import Decimal, DecimalException
 import logging
+from metrics import metrics
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# DynamoDB client
-dynamodb = boto3.resource('dynamodb')
+# DynamoDB table; the client is created on first use to keep boto3 out of cold start
 table_name = os.environ.get('DYNAMODB_TABLE', 'calcburst-calculations')
-table = dynamodb.Table(table_name)
 
-# Prometheus metrics
-REQUEST_COUNT = Counter('calcburst_requests_total', 'Total calculation requests')
-REQUEST_LATENCY = Histogram('calcburst_request_latency_seconds', 'Request latency')
-CALCULATION_ERRORS = Counter('calcburst_errors_total', 'Total calculation errors')
-ACTIVE_REQUESTS = Gauge('calcburst_active_requests', 'Currently active requests')
+# Shared by every response; the Lambda runtime only reads it
+_RESP_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Maximum number of items per BatchWriteItem call
+BATCH_WRITE_LIMIT = 25
+
+# Retries for unprocessed BatchWriteItem items, with exponential backoff
+BATCH_WRITE_MAX_RETRIES = 5
+BATCH_WRITE_BACKOFF_SECONDS = 0.05
+
+# Maximum number of operations accepted by the /batch endpoint
+MAX_BATCH_OPERATIONS = 100
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps(obj):
+    """
+    Serialize a response body with orjson
+    Falls back to json for integers outside the 64-bit range orjson supports
+    """
+    try:
+        return orjson.dumps(obj, default=_default).decode()
+    except TypeError:
+        return json.dumps(obj, default=_default)
+
+# Operation dispatch table; each entry reduces the full operand list
+_OPS = {
+    'add': sum,
+    'subtract': lambda xs: functools.reduce(operator.sub, xs),
+    'multiply': math.prod,
+    'divide': lambda xs: functools.reduce(operator.truediv, xs),
+    'power': lambda xs: xs[0] ** xs[1],
+    'modulo': lambda xs: xs[0] % xs[1],
+}
+
+# Two-operand fast path, which covers most requests
+_OPS2 = {
+    'add': operator.add,
+    'subtract': operator.sub,
+    'multiply': operator.mul,
+    'divide': operator.truediv,
+    'power': operator.pow,
+    'modulo': operator.mod,
+}
+
+def _check_result(result):
+    """
+    Reject results that are not real numbers, such as string concatenation
+    or complex roots, and inf and nan, which JSON cannot represent
+    """
+    if isinstance(result, bool) or not isinstance(result, (int, float)):
+        raise ValueError("Result is not a real number")
+    if isinstance(result, float) and not math.isfinite(result):
+        raise ValueError("Result is not a finite number")
+    return result
 
 def perform_calculation(operation, operands):
     """
     Perform mathematical calculations based on operation type
     Supports: add, subtract, multiply, divide, power, modulo
     """
+    if not isinstance(operation, str):
+        raise ValueError(f"Unsupported operation: {operation}")
+    
     if len(operands) < 2:
         raise ValueError("At least two operands required")
     
-    result = operands[0]
+    if len(operands) == 2:
+        calculate = _OPS2.get(operation)
+        if calculate is None:
+            raise ValueError(f"Unsupported operation: {operation}")
+        if operation == 'divide' and operands[1] == 0:
+            raise ValueError("Division by zero")
+        return _check_result(calculate(operands[0], operands[1]))
     
-    if operation == 'add':
-        for num in operands[1:]:
-            result += num
-    elif operation == 'subtract':
-        for num in operands[1:]:
-            result -= num
-    elif operation == 'multiply':
-        for num in operands[1:]:
-            result *= num
-    elif operation == 'divide':
-        for num in operands[1:]:
-            if num == 0:
-                raise ValueError("Division by zero")
-            result /= num
-    elif operation == 'power':
-        result = operands[0] ** operands[1]
-    elif operation == 'modulo':
-        result = operands[0] % operands[1]
-    else:
+    try:
+        calculate = _OPS[operation]
+    except KeyError:
         raise ValueError(f"Unsupported operation: {operation}")
     
-    return result
+    if operation == 'divide' and 0 in islice(operands, 1, None):
+        raise ValueError("Division by zero")
+    
+    return _check_result(calculate(operands))
+
+def _iso_now():
+    """
+    Current UTC time formatted like datetime.utcnow().isoformat()
+    Microseconds are always included
+    """
+    t = time.time()
+    g = time.gmtime(t)
+    return (f"{g.tm_year:04d}-{g.tm_mon:02d}-{g.tm_mday:02d}"
+            f"T{g.tm_hour:02d}:{g.tm_min:02d}:{g.tm_sec:02d}.{int((t % 1) * 1e6):06d}")
 
-def store_calculation(calc_id, operation, operands, result, execution_time):
+def _to_dec(value):
+    """
+    Convert a number to Decimal for DynamoDB
+    Ints convert exactly; floats go through their shortest round-trip repr
+    """
+    if isinstance(value, int):
+        return Decimal(value)
+    return Decimal(repr(value))
+
+def _build_item(calc_id, operation, operands, result, execution_time, timestamp):
+    """
+    Build the DynamoDB item for a calculation
+    """
+    return {
+        'calculation_id': calc_id,
+        'operation': operation,
+        'operands': [_to_dec(op) for op in operands],
+        'result': _to_dec(result),
+        'timestamp': timestamp,
+        'execution_time_ms': _to_dec(execution_time),
+        'ttl': int(time.time()) + 2592000  # 30 days TTL
+    }
+
+@functools.lru_cache(maxsize=1)
+def _get_dynamodb():
+    """
+    Create the low-level DynamoDB client on first use
+    """
+    import boto3
+    return boto3.client('dynamodb')
+
+@functools.lru_cache(maxsize=1)
+def _get_serializer():
+    from boto3.dynamodb.types import TypeSerializer
+    return TypeSerializer()
+
+def _serialize(item):
+    """
+    Convert an item to DynamoDB attribute values
+    """
+    serializer = _get_serializer()
+    return {key: serializer.serialize(value) for key, value in item.items()}
+
+def store_calculation(calc_id, operation, operands, result, execution_time, timestamp):
     """
     Store calculation result in DynamoDB with metadata
     """
     try:
-        item = {
-            'calculation_id': calc_id,
-            'operation': operation,
-            'operands': [Decimal(str(op)) for op in operands],
-            'result': Decimal(str(result)),
-            'timestamp': datetime.utcnow().isoformat(),
-            'execution_time_ms': Decimal(str(execution_time)),
-            'ttl': int(time.time()) + 2592000  # 30 days TTL
-        }
+        item = _build_item(calc_id, operation, operands, result, execution_time, timestamp)
         
-        table.put_item(Item=item)
+        _get_dynamodb().put_item(TableName=table_name, Item=_serialize(item))
         logger.info(f"Stored calculation {calc_id} successfully")
         return True
     except Exception as e:
         logger.error(f"DynamoDB error: {str(e)}")
-        CALCULATION_ERRORS.inc()
+        metrics.inc('Errors')
         return False
 
+def store_calculations(items):
+    """
+    Store multiple serialized calculation items in DynamoDB
+    Items are sent in BatchWriteItem calls of up to 25; unprocessed items
+    are resent with jittered exponential backoff, up to BATCH_WRITE_MAX_RETRIES times
+    """
+    try:
+        for start in range(0, len(items), BATCH_WRITE_LIMIT):
+            pending = {
+                table_name: [
+                    {'PutRequest': {'Item': item}}
+                    for item in items[start:start + BATCH_WRITE_LIMIT]
+                ]
+            }
+            attempt = 0
+            while pending:
+                if attempt > BATCH_WRITE_MAX_RETRIES:
+                    remaining = sum(len(requests) for requests in pending.values())
+                    raise RuntimeError(
+                        f"{remaining} items unprocessed after {BATCH_WRITE_MAX_RETRIES} retries"
+                    )
+                if attempt:
+                    time.sleep(random.uniform(0, BATCH_WRITE_BACKOFF_SECONDS * 2 ** attempt))
+                response = _get_dynamodb().batch_write_item(RequestItems=pending)
+                pending = response.get('UnprocessedItems')
+                attempt += 1
+        logger.info(f"Stored {len(items)} calculations successfully")
+        return True
+    except Exception as e:
+        logger.error(f"DynamoDB error: {str(e)}")
+        metrics.inc('Errors')
+        return False
+
+def handle_batch(operations, timestamp):
+    """
+    Perform a list of calculations in one request
+    Each operation gets its own result or error entry, in request order
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("Batch body must be a non-empty list of operations")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    
+    now_ms = int(time.time() * 1000)
+    results = []
+    items = []
+    # BatchWriteItem rejects a whole chunk that repeats a key
+    seen_ids = set()
+    
+    for index, op in enumerate(operations):
+        op_start = time.perf_counter()
+        try:
+            if not isinstance(op, dict):
+                raise ValueError("Operation must be an object")
+            
+            operation = op.get('operation')
+            operands = op.get('operands', [])
+            calc_id = op.get('id', f"calc-{now_ms}-{index}")
+            
+            if not operation or not operands:
+                raise ValueError("Missing operation or operands")
+            if calc_id in seen_ids:
+                raise ValueError(f"Duplicate calculation id: {calc_id}")
+            
+            result = perform_calculation(operation, operands)
+            execution_time = (time.perf_counter() - op_start) * 1000
+            # Serialize here so a row DynamoDB cannot represent only fails its own entry
+            item = _serialize(
+                _build_item(calc_id, operation, operands, result, execution_time, timestamp)
+            )
+            seen_ids.add(calc_id)
+        except DecimalException:
+            # DynamoDB numbers are limited to 38 significant digits
+            metrics.inc('Errors')
+            results.append({'error': 'Result cannot be stored'})
+            continue
+        except (ValueError, TypeError, ArithmeticError) as e:
+            metrics.inc('Errors')
+            results.append({'error': str(e)})
+            continue
+        
+        items.append(item)
+        results.append({
+            'calculation_id': calc_id,
+            'operation': operation,
+            'operands': operands,
+            'result': result,
+            'execution_time_ms': round(execution_time, 2),
+            'timestamp': timestamp
+        })
+    
+    metrics.inc('BatchOperations', len(operations))
+    
+    # Store all rows in BatchWriteItem calls
+    if items:
+        store_calculations(items)
+    
+    logger.info(f"Batch of {len(operations)} calculations completed")
+    return {
+        'statusCode': 200,
+        'headers': _RESP_HEADERS,
+        'body': _dumps({'results': results})
+    }
+
 def lambda_handler(event, context):
     """
     Main Lambda handler for calculation requests
     """
-    start_time = time.time()
-    REQUEST_COUNT.inc()
-    ACTIVE_REQUESTS.inc()
+    start_time = time.perf_counter()
+    timestamp = _iso_now()
+    metrics.inc('Requests')
     
     try:
         # Parse request body
         if 'body' in event:
-            body = json.loads(event['body'])
+            body = orjson.loads(event['body'])
         else:
             body = event
         
+        if event.get('resource') == '/batch':
+            return handle_batch(body, timestamp)
+        
         operation = body.get('operation')
         operands = body.get('operands', [])
         calc_id = body.get('id', f"calc-{int(time.time() * 1000)}")
@@ -107,11 +307,8 @@ def lambda_handler(event, context):
         if not operation or not operands:
             return {
                 'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
+                'headers': _RESP_HEADERS,
+                'body': _dumps({
                     'error': 'Missing operation or operands'
                 })
             }
@@ -120,60 +317,51 @@ def lambda_handler(event, context):
         result = perform_calculation(operation, operands)
         
         # Calculate execution time
-        execution_time = (time.time() - start_time) * 1000
+        execution_time = (time.perf_counter() - start_time) * 1000
         
         # Store in DynamoDB
-        store_calculation(calc_id, operation, operands, result, execution_time)
+        store_calculation(calc_id, operation, operands, result, execution_time, timestamp)
         
         # Record latency
-        REQUEST_LATENCY.observe(time.time() - start_time)
+        metrics.observe('Latency', execution_time)
         
         # Return response
         response = {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
+            'headers': _RESP_HEADERS,
+            'body': _dumps({
                 'calculation_id': calc_id,
                 'operation': operation,
                 'operands': operands,
                 'result': result,
                 'execution_time_ms': round(execution_time, 2),
-                'timestamp': datetime.utcnow().isoformat()
-            }, cls=DecimalEncoder)
+                'timestamp': timestamp
+            })
         }
         
         logger.info(f"Calculation {calc_id} completed in {execution_time:.2f}ms")
         return response
         
     except ValueError as e:
-        CALCULATION_ERRORS.inc()
+        metrics.inc('Errors')
         logger.error(f"Validation error: {str(e)}")
         return {
             'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
+            'headers': _RESP_HEADERS,
+            'body': _dumps({
                 'error': str(e)
             })
         }
     except Exception as e:
-        CALCULATION_ERRORS.inc()
+        metrics.inc('Errors')
         logger.error(f"Unexpected error: {str(e)}")
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
+            'headers': _RESP_HEADERS,
+            'body': _dumps({
                 'error': 'Internal server error'
             })
         }
     finally:
-        ACTIVE_REQUESTS.dec()
+        metrics.flush()
 
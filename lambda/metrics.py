@@ -0,0 +1,63 @@
+import json
+import time
+import threading
+from collections import Counter, defaultdict
+
+# CloudWatch namespace for request metrics
+NAMESPACE = 'CalcBurst'
+SERVICE = 'calcburst-calculator'
+
+class MetricsBuffer:
+    """
+    Process-local metric buffer flushed as CloudWatch Embedded Metric Format
+    Updates and the flush-time buffer swap share one lock, so they are thread-safe
+    """
+    
+    def __init__(self, namespace=NAMESPACE):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._observations = defaultdict(list)
+    
+    def inc(self, name, value=1):
+        """Add value to a Count metric"""
+        with self._lock:
+            self._counts[name] += value
+    
+    def observe(self, name, value):
+        """Record one Milliseconds sample"""
+        with self._lock:
+            self._observations[name].append(value)
+    
+    def flush(self):
+        """
+        Print buffered metrics as a single EMF log line
+        CloudWatch extracts the metrics from the log, so no API call is made
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            observations, self._observations = self._observations, defaultdict(list)
+        
+        if not counts and not observations:
+            return
+        
+        definitions = [{'Name': name, 'Unit': 'Count'} for name in counts]
+        definitions += [{'Name': name, 'Unit': 'Milliseconds'} for name in observations]
+        
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [['Service']],
+                    'Metrics': definitions
+                }]
+            },
+            'Service': SERVICE
+        }
+        record.update(counts)
+        record.update(observations)
+        
+        print(json.dumps(record))
+
+metrics = MetricsBuffer()
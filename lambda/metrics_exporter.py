@@ -1,97 +1,135 @@
 import json
+import asyncio
+import aioboto3
 import boto3
+import httpx
 import os
+import time
 from datetime import datetime, timedelta
-from prometheus_client import CollectorRegistry, Gauge, push_to_gateway
+from prometheus_client import CollectorRegistry, Gauge, generate_latest, CONTENT_TYPE_LATEST
 import logging
+from metrics import NAMESPACE, SERVICE
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# CloudWatch client
-cloudwatch = boto3.client('cloudwatch')
+# AWS clients; CloudWatch is queried through aioboto3 so fetches run concurrently
+session = aioboto3.Session()
 dynamodb = boto3.resource('dynamodb')
 
 # Prometheus gateway
 PROMETHEUS_GATEWAY = os.environ.get('PROMETHEUS_GATEWAY', 'localhost:9091')
+if '://' not in PROMETHEUS_GATEWAY:
+    PROMETHEUS_GATEWAY = f"http://{PROMETHEUS_GATEWAY}"
+PUSH_URL = f"{PROMETHEUS_GATEWAY}/metrics/job/calcburst-metrics"
 registry = CollectorRegistry()
 
+# Kept alive across warm invocations so pushes reuse the gateway connection
+gateway_client = httpx.Client(
+    http2=True,
+    timeout=5.0,
+    limits=httpx.Limits(keepalive_expiry=300)
+)
+
 # Metrics
 lambda_invocations = Gauge('calcburst_lambda_invocations', 'Lambda invocations', registry=registry)
 lambda_errors = Gauge('calcburst_lambda_errors', 'Lambda errors', registry=registry)
 lambda_duration = Gauge('calcburst_lambda_duration_ms', 'Lambda duration', registry=registry)
 dynamodb_consumed_capacity = Gauge('calcburst_dynamodb_consumed_capacity', 'DynamoDB consumed capacity', registry=registry)
 api_gateway_requests = Gauge('calcburst_api_requests', 'API Gateway requests', registry=registry)
+lambda_concurrency = Gauge('calcburst_lambda_concurrent_executions', 'Lambda concurrent executions', registry=registry)
+
+# Request metrics the calculator publishes as EMF, per 5-minute window
+calc_requests = Gauge('calcburst_requests', 'Calculation requests per window', registry=registry)
+calc_errors = Gauge('calcburst_errors', 'Calculation errors per window', registry=registry)
+calc_latency = Gauge('calcburst_request_latency_ms', 'Request latency percentiles',
+                     ['percentile'], registry=registry)
+
+LATENCY_PERCENTILES = ('p50', 'p95', 'p99')
+
+# A settled window with no datapoints means nothing happened, so these
+# statistics read as 0; EMF in particular only emits Errors when one occurs
+EMPTY_AS_ZERO_STATS = ('Sum', 'Maximum')
+
+# CloudWatch query window, and how long a warm container keeps cached results
+PERIOD_SECONDS = 300
+# CloudWatch metrics arrive minutes late, so the window that just closed is
+# skipped and only windows at least one full period old are queried
+SETTLE_PERIODS = 1
+CACHE_MAX_AGE_SECONDS = 3600
+_cache = {}
+_cache_started = time.time()
+
+async def _fetch(cloudwatch, namespace, metric_name, dim_name, dim_value, bucket, stat):
+    """
+    Fetch a single statistic for the 5-minute window ending at bucket
+    Settled windows do not change, so non-empty results are memoized per bucket
+    Percentile stats such as 'p95' are requested as extended statistics
+    """
+    key = (namespace, metric_name, dim_name, dim_value, bucket, stat)
+    if key in _cache:
+        return _cache[key]
+    
+    end_time = datetime.utcfromtimestamp(bucket * PERIOD_SECONDS)
+    start_time = end_time - timedelta(seconds=PERIOD_SECONDS)
+    
+    response = await cloudwatch.get_metric_statistics(
+        Namespace=namespace,
+        MetricName=metric_name,
+        Dimensions=[
+            {'Name': dim_name, 'Value': dim_value}
+        ],
+        StartTime=start_time,
+        EndTime=end_time,
+        Period=PERIOD_SECONDS,
+        **({'ExtendedStatistics': [stat]} if stat.startswith('p') else {'Statistics': [stat]})
+    )
+    if not response['Datapoints']:
+        # Data may still be arriving; query again next run
+        return None
+    
+    datapoint = response['Datapoints'][0]
+    value = datapoint['ExtendedStatistics'][stat] if stat.startswith('p') else datapoint[stat]
+    _cache[key] = value
+    return value
 
-def get_cloudwatch_metrics():
+async def get_cloudwatch_metrics():
     """
     Fetch metrics from CloudWatch
     """
-    end_time = datetime.utcnow()
-    start_time = end_time - timedelta(minutes=5)
+    global _cache_started
+    if time.time() - _cache_started > CACHE_MAX_AGE_SECONDS:
+        _cache.clear()
+        _cache_started = time.time()
+    
+    bucket = int(time.time()) // PERIOD_SECONDS - SETTLE_PERIODS
     
     metrics = {}
     
     try:
-        # Lambda invocations
-        response = cloudwatch.get_metric_statistics(
-            Namespace='AWS/Lambda',
-            MetricName='Invocations',
-            Dimensions=[
-                {'Name': 'FunctionName', 'Value': 'calcburst-calculator'}
-            ],
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=300,
-            Statistics=['Sum']
-        )
-        if response['Datapoints']:
-            metrics['invocations'] = response['Datapoints'][0]['Sum']
-        
-        # Lambda errors
-        response = cloudwatch.get_metric_statistics(
-            Namespace='AWS/Lambda',
-            MetricName='Errors',
-            Dimensions=[
-                {'Name': 'FunctionName', 'Value': 'calcburst-calculator'}
-            ],
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=300,
-            Statistics=['Sum']
-        )
-        if response['Datapoints']:
-            metrics['errors'] = response['Datapoints'][0]['Sum']
-        
-        # Lambda duration
-        response = cloudwatch.get_metric_statistics(
-            Namespace='AWS/Lambda',
-            MetricName='Duration',
-            Dimensions=[
-                {'Name': 'FunctionName', 'Value': 'calcburst-calculator'}
-            ],
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=300,
-            Statistics=['Average']
-        )
-        if response['Datapoints']:
-            metrics['duration'] = response['Datapoints'][0]['Average']
+        async with session.client('cloudwatch') as cloudwatch:
+            queries = {
+                'invocations': ('AWS/Lambda', 'Invocations', 'FunctionName', 'calcburst-calculator', 'Sum'),
+                'errors': ('AWS/Lambda', 'Errors', 'FunctionName', 'calcburst-calculator', 'Sum'),
+                'duration': ('AWS/Lambda', 'Duration', 'FunctionName', 'calcburst-calculator', 'Average'),
+                'concurrency': ('AWS/Lambda', 'ConcurrentExecutions', 'FunctionName', 'calcburst-calculator', 'Maximum'),
+                'api_requests': ('AWS/ApiGateway', 'Count', 'ApiName', 'CalcBurstAPI', 'Sum'),
+                'requests': (NAMESPACE, 'Requests', 'Service', SERVICE, 'Sum'),
+                'calculation_errors': (NAMESPACE, 'Errors', 'Service', SERVICE, 'Sum'),
+            }
+            for percentile in LATENCY_PERCENTILES:
+                queries[f"latency_{percentile}"] = (NAMESPACE, 'Latency', 'Service', SERVICE, percentile)
+            
+            values = await asyncio.gather(*(
+                _fetch(cloudwatch, namespace, metric_name, dim_name, dim_value, bucket, stat)
+                for namespace, metric_name, dim_name, dim_value, stat in queries.values()
+            ))
         
-        # API Gateway requests
-        response = cloudwatch.get_metric_statistics(
-            Namespace='AWS/ApiGateway',
-            MetricName='Count',
-            Dimensions=[
-                {'Name': 'ApiName', 'Value': 'CalcBurstAPI'}
-            ],
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=300,
-            Statistics=['Sum']
-        )
-        if response['Datapoints']:
-            metrics['api_requests'] = response['Datapoints'][0]['Sum']
+        for (name, query), value in zip(queries.items(), values):
+            if value is not None:
+                metrics[name] = value
+            elif query[-1] in EMPTY_AS_ZERO_STATS:
+                metrics[name] = 0
             
     except Exception as e:
         logger.error(f"Error fetching CloudWatch metrics: {str(e)}")
@@ -103,7 +141,7 @@ def lambda_handler(event, context):
     Export metrics to Prometheus Push Gateway
     """
     try:
-        metrics = get_cloudwatch_metrics()
+        metrics = asyncio.run(get_cloudwatch_metrics())
         
         # Update Prometheus metrics
         if 'invocations' in metrics:
@@ -114,9 +152,30 @@ def lambda_handler(event, context):
             lambda_duration.set(metrics['duration'])
         if 'api_requests' in metrics:
             api_gateway_requests.set(metrics['api_requests'])
+        if 'concurrency' in metrics:
+            lambda_concurrency.set(metrics['concurrency'])
+        if 'requests' in metrics:
+            calc_requests.set(metrics['requests'])
+        if 'calculation_errors' in metrics:
+            calc_errors.set(metrics['calculation_errors'])
+        for percentile in LATENCY_PERCENTILES:
+            if f"latency_{percentile}" in metrics:
+                calc_latency.labels(percentile=percentile).set(metrics[f"latency_{percentile}"])
+            else:
+                # No requests in the window; drop the series rather than push a stale value
+                try:
+                    calc_latency.remove(percentile)
+                except KeyError:
+                    pass
         
         # Push to Prometheus Gateway
-        push_to_gateway(PROMETHEUS_GATEWAY, job='calcburst-metrics', registry=registry)
+        # PUT replaces the job's metrics, matching push_to_gateway
+        response = gateway_client.put(
+            PUSH_URL,
+            content=generate_latest(registry),
+            headers={'Content-Type': CONTENT_TYPE_LATEST}
+        )
+        response.raise_for_status()
         
         logger.info("Metrics exported successfully")
         
@@ -37,6 +37,7 @@ cd lambda
 pip install -r requirements.txt -t package/
 cp calculation_handler.py package/
 cp metrics_exporter.py package/
+cp metrics.py package/
 cd package
 zip -r ../deployment-package.zip .
 cd ..
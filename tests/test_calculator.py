@@ -2,10 +2,13 @@ import unittest
 import json
 import sys
 import os
+from unittest import mock
+from datetime import datetime, timedelta
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../lambda'))
 
-from calculation_handler import perform_calculation, lambda_handler
+import calculation_handler
+from calculation_handler import perform_calculation, lambda_handler, _iso_now
 
 class TestCalculationEngine(unittest.TestCase):
     
@@ -17,6 +20,10 @@ class TestCalculationEngine(unittest.TestCase):
         result = perform_calculation('subtract', [100, 30, 20])
         self.assertEqual(result, 50)
     
+    def test_subtraction_is_sequential(self):
+        self.assertEqual(perform_calculation('subtract', [0.3, 0.1, 0.1, 0.1]), 0.3 - 0.1 - 0.1 - 0.1)
+        self.assertEqual(perform_calculation('subtract', [1.0, 0.1, 0.2, 0.3]), 1.0 - 0.1 - 0.2 - 0.3)
+    
     def test_multiplication(self):
         result = perform_calculation('multiply', [5, 4, 2])
         self.assertEqual(result, 40)
@@ -44,6 +51,41 @@ class TestCalculationEngine(unittest.TestCase):
     def test_insufficient_operands(self):
         with self.assertRaises(ValueError):
             perform_calculation('add', [10])
+    
+    def test_large_operand_list(self):
+        operands = [0.5] * 64
+        self.assertAlmostEqual(perform_calculation('add', operands), 32.0)
+        self.assertAlmostEqual(perform_calculation('multiply', operands), 0.5 ** 64)
+        self.assertAlmostEqual(perform_calculation('subtract', operands), -31.0)
+    
+    def test_large_division_by_zero(self):
+        with self.assertRaises(ValueError):
+            perform_calculation('divide', [1.5] * 40 + [0.0])
+    
+    def test_non_real_result(self):
+        with self.assertRaises(ValueError):
+            perform_calculation('add', ['a', 'b'])
+        with self.assertRaises(ValueError):
+            perform_calculation('power', [-8, 0.5])
+    
+    def test_non_finite_result(self):
+        with self.assertRaises(ValueError):
+            perform_calculation('multiply', [1e308, 10])
+        with self.assertRaises(ValueError):
+            perform_calculation('add', [1e308, 1e308, 1e308])
+    
+    def test_result_keeps_operand_types(self):
+        self.assertIsInstance(perform_calculation('add', [1, 2]), int)
+        self.assertIsInstance(perform_calculation('add', [1.0, 2.0]), float)
+
+class TestTimestamp(unittest.TestCase):
+    
+    def test_iso_now_matches_isoformat(self):
+        timestamp = _iso_now()
+        expected = datetime.utcnow().replace(microsecond=1).isoformat()
+        self.assertEqual(len(timestamp), len(expected))
+        parsed = datetime.fromisoformat(timestamp)
+        self.assertLess(abs(datetime.utcnow() - parsed), timedelta(seconds=1))
 
 class TestLambdaHandler(unittest.TestCase):
     
@@ -61,6 +103,17 @@ class TestLambdaHandler(unittest.TestCase):
         body = json.loads(response['body'])
         self.assertEqual(body['result'], 60)
     
+    def test_non_finite_result_request(self):
+        event = {
+            'body': json.dumps({
+                'operation': 'multiply',
+                'operands': [1e308, 10]
+            })
+        }
+        
+        response = lambda_handler(event, None)
+        self.assertEqual(response['statusCode'], 400)
+    
     def test_missing_operation(self):
         event = {
             'body': json.dumps({
@@ -81,6 +134,112 @@ class TestLambdaHandler(unittest.TestCase):
         response = lambda_handler(event, None)
         self.assertEqual(response['statusCode'], 400)
 
+class TestBatchHandler(unittest.TestCase):
+    
+    def test_batch_request(self):
+        event = {
+            'resource': '/batch',
+            'body': json.dumps([
+                {'operation': 'add', 'operands': [1, 2, 3]},
+                {'operation': 'divide', 'operands': [10, 0]},
+                {'operation': 'power', 'operands': [2, 8]}
+            ])
+        }
+        
+        response = lambda_handler(event, None)
+        self.assertEqual(response['statusCode'], 200)
+        
+        results = json.loads(response['body'])['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['result'], 6)
+        self.assertIn('error', results[1])
+        self.assertEqual(results[2]['result'], 256)
+    
+    def test_batch_failed_operations_do_not_fail_request(self):
+        event = {
+            'resource': '/batch',
+            'body': json.dumps([
+                {'operation': 'add', 'operands': [1, 2]},
+                {'operation': 'modulo', 'operands': [5, 0]},
+                {'operation': 'add', 'operands': [1, 'a']},
+                {'operation': 'power', 'operands': [10.0, 1000]},
+                {'operation': 'add', 'operands': ['a', 'b']},
+                {'operation': 'power', 'operands': [-8, 0.5]}
+            ])
+        }
+        
+        response = lambda_handler(event, None)
+        self.assertEqual(response['statusCode'], 200)
+        
+        results = json.loads(response['body'])['results']
+        self.assertEqual(results[0]['result'], 3)
+        for result in results[1:]:
+            self.assertIn('error', result)
+    
+    def test_batch_duplicate_ids(self):
+        event = {
+            'resource': '/batch',
+            'body': json.dumps([
+                {'operation': 'add', 'operands': [1, 2], 'id': 'same'},
+                {'operation': 'add', 'operands': [3, 4], 'id': 'same'}
+            ])
+        }
+        
+        response = lambda_handler(event, None)
+        self.assertEqual(response['statusCode'], 200)
+        
+        results = json.loads(response['body'])['results']
+        self.assertEqual(results[0]['result'], 3)
+        self.assertIn('error', results[1])
+    
+    def test_empty_batch(self):
+        event = {
+            'resource': '/batch',
+            'body': json.dumps([])
+        }
+        
+        response = lambda_handler(event, None)
+        self.assertEqual(response['statusCode'], 400)
+
+class TestStoreCalculations(unittest.TestCase):
+    
+    def test_unprocessed_items_retry_is_capped(self):
+        client = mock.Mock()
+        client.batch_write_item.side_effect = lambda RequestItems: {'UnprocessedItems': RequestItems}
+        items = [{'calculation_id': {'S': 'calc-1'}, 'result': {'N': '1'}}]
+        
+        with mock.patch.object(calculation_handler, '_get_dynamodb', return_value=client), \
+                mock.patch.object(calculation_handler.time, 'sleep') as sleep:
+            self.assertFalse(calculation_handler.store_calculations(items))
+        
+        self.assertEqual(client.batch_write_item.call_count,
+                         calculation_handler.BATCH_WRITE_MAX_RETRIES + 1)
+        self.assertEqual(sleep.call_count, calculation_handler.BATCH_WRITE_MAX_RETRIES)
+
+    def test_unstorable_row_does_not_sink_batch(self):
+        client = mock.Mock()
+        client.batch_write_item.return_value = {'UnprocessedItems': {}}
+        event = {
+            'resource': '/batch',
+            'body': json.dumps([
+                {'operation': 'add', 'operands': [1, 2]},
+                {'operation': 'power', 'operands': [3, 100]},
+                {'operation': 'multiply', 'operands': [1e200, 1e100]}
+            ])
+        }
+        
+        with mock.patch.object(calculation_handler, '_get_dynamodb', return_value=client):
+            response = lambda_handler(event, None)
+        
+        results = json.loads(response['body'])['results']
+        self.assertEqual(results[0]['result'], 3)
+        self.assertIn('error', results[1])
+        self.assertIn('error', results[2])
+        
+        client.batch_write_item.assert_called_once()
+        written = client.batch_write_item.call_args.kwargs['RequestItems'][calculation_handler.table_name]
+        self.assertEqual(len(written), 1)
+
 if __name__ == '__main__':
     unittest.main()
 
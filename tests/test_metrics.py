@@ -0,0 +1,104 @@
+import unittest
+import asyncio
+import io
+import json
+import sys
+import os
+from contextlib import redirect_stdout
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../lambda'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import metrics_exporter
+from metrics import MetricsBuffer, NAMESPACE, SERVICE
+
+class FakeCloudWatch:
+    """Returns a datapoint for every query except the metrics listed as empty"""
+    
+    def __init__(self, empty):
+        self.empty = empty
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def get_metric_statistics(self, **kwargs):
+        if (kwargs['Namespace'], kwargs['MetricName']) in self.empty:
+            return {'Datapoints': []}
+        if 'ExtendedStatistics' in kwargs:
+            stat = kwargs['ExtendedStatistics'][0]
+            return {'Datapoints': [{'ExtendedStatistics': {stat: 12.5}}]}
+        return {'Datapoints': [{kwargs['Statistics'][0]: 7.0}]}
+
+class TestMetricsBuffer(unittest.TestCase):
+    
+    def test_flush_emits_emf(self):
+        buffer = MetricsBuffer()
+        buffer.inc('Requests')
+        buffer.inc('Requests')
+        buffer.observe('Latency', 1.5)
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            buffer.flush()
+        
+        record = json.loads(output.getvalue())
+        directive = record['_aws']['CloudWatchMetrics'][0]
+        self.assertEqual(directive['Namespace'], NAMESPACE)
+        self.assertEqual(directive['Dimensions'], [['Service']])
+        self.assertIn({'Name': 'Requests', 'Unit': 'Count'}, directive['Metrics'])
+        self.assertIn({'Name': 'Latency', 'Unit': 'Milliseconds'}, directive['Metrics'])
+        self.assertEqual(record['Service'], SERVICE)
+        self.assertEqual(record['Requests'], 2)
+        self.assertEqual(record['Latency'], [1.5])
+    
+    def test_flush_resets_buffer(self):
+        buffer = MetricsBuffer()
+        buffer.inc('Errors')
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            buffer.flush()
+            buffer.flush()
+        
+        self.assertEqual(len(output.getvalue().splitlines()), 1)
+
+class TestMetricsExporter(unittest.TestCase):
+    
+    def setUp(self):
+        metrics_exporter._cache.clear()
+    
+    def export(self, empty):
+        cloudwatch = FakeCloudWatch(empty)
+        gateway = mock.Mock()
+        with mock.patch.object(metrics_exporter.session, 'client', return_value=cloudwatch), \
+                mock.patch.object(metrics_exporter, 'gateway_client', gateway):
+            response = metrics_exporter.lambda_handler({}, None)
+        self.assertEqual(response['statusCode'], 200)
+        return json.loads(response['body'])['metrics'], gateway.put.call_args.kwargs['content'].decode()
+    
+    def test_exports_request_metrics(self):
+        metrics, pushed = self.export(empty=set())
+        self.assertEqual(metrics['requests'], 7.0)
+        self.assertEqual(metrics['latency_p95'], 12.5)
+        self.assertIn('calcburst_requests 7.0', pushed)
+        self.assertIn('calcburst_request_latency_ms{percentile="p95"} 12.5', pushed)
+    
+    def test_empty_windows_reset_stale_values(self):
+        self.export(empty=set())
+        # The next run queries a new window
+        metrics_exporter._cache.clear()
+        
+        metrics, pushed = self.export(empty={(NAMESPACE, 'Errors'), (NAMESPACE, 'Requests'),
+                                             (NAMESPACE, 'Latency')})
+        self.assertEqual(metrics['calculation_errors'], 0)
+        self.assertEqual(metrics['requests'], 0)
+        self.assertIn('calcburst_errors 0.0', pushed)
+        self.assertIn('calcburst_requests 0.0', pushed)
+        self.assertNotIn('calcburst_request_latency_ms{', pushed)
+
+if __name__ == '__main__':
+    unittest.main()